@@ -22,11 +22,44 @@ import os
 import socket
 import re
 import threading
+import logging
+import functools
+import string
+import queue
 from PIL import Image, ImageDraw, ImageFont
 from adafruit_rgb_display import st7789
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import RPi.GPIO as GPIO
+except (ImportError, RuntimeError):  # not installed, or not running on a supported Pi
+    GPIO = None
+
+# Per-event chatter is logged at DEBUG and lazily formatted, so at the default
+# WARNING level the hot paths build no strings and write nothing to journald.
+# Set ASL_LOG_LEVEL=DEBUG (or INFO) in the service environment to see it.
+logging.basicConfig(format="%(levelname)s: %(message)s")
+log = logging.getLogger("asl")
+_log_level = os.environ.get("ASL_LOG_LEVEL", "WARNING").upper()
+if not isinstance(logging.getLevelName(_log_level), int):  # works on Python < 3.11 too
+    log.warning("Unknown ASL_LOG_LEVEL '%s', using WARNING", _log_level)
+    _log_level = "WARNING"
+log.setLevel(_log_level)
+
 VERSION = "1.75"
 
+# Asterisk Manager Interface (AMI). Set a manager user from
+# /etc/asterisk/manager.conf here (or via the environment) to query Asterisk
+# over a persistent socket; leave the secret empty to use `asterisk -rx`.
+AMI_HOST = "127.0.0.1"
+AMI_PORT = 5038
+AMI_USERNAME = os.environ.get("ASL_AMI_USERNAME", "admin")
+AMI_SECRET = os.environ.get("ASL_AMI_SECRET", "")
+
 # Configuration for CS and DC pins
 cs_pin = digitalio.DigitalInOut(board.CE0)
 dc_pin = digitalio.DigitalInOut(board.D25)
@@ -36,13 +69,34 @@ BAUDRATE = 24000000
 # Setup SPI bus
 spi = board.SPI()
 
-# Configure buttons (Adafruit Mini PiTFT: Button A on GPIO 23, Button B on GPIO 24)
-button_a = digitalio.DigitalInOut(board.D23)
-button_a.direction = digitalio.Direction.INPUT
-button_a.pull = digitalio.Pull.UP
-button_b = digitalio.DigitalInOut(board.D24)
-button_b.direction = digitalio.Direction.INPUT
-button_b.pull = digitalio.Pull.UP
+# Configure buttons (Adafruit Mini PiTFT: Button A on GPIO 23, Button B on GPIO 24).
+# Where RPi.GPIO works it gives us kernel edge interrupts, so the main loop can
+# sleep instead of polling the pins. Elsewhere (e.g. a Pi 5, where Blinka uses
+# lgpio) the buttons are read through digitalio and polled.
+BUTTON_A_PIN = 23
+BUTTON_B_PIN = 24
+if GPIO is not None:
+    try:
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(BUTTON_A_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        GPIO.setup(BUTTON_B_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+    except (RuntimeError, ValueError) as e:
+        log.warning("RPi.GPIO setup failed (%s); reading buttons through digitalio", e)
+        GPIO = None
+
+_button_io = {}
+if GPIO is None:
+    for _pin, _board_pin in ((BUTTON_A_PIN, board.D23), (BUTTON_B_PIN, board.D24)):
+        _button_io[_pin] = digitalio.DigitalInOut(_board_pin)
+        _button_io[_pin].direction = digitalio.Direction.INPUT
+        _button_io[_pin].pull = digitalio.Pull.UP
+
+
+def button_is_down(pin):
+    """True while the button on BCM pin is held (the buttons pull to ground)."""
+    if GPIO is None:
+        return not _button_io[pin].value
+    return GPIO.input(pin) == GPIO.LOW
 
 # Create the ST7789 display
 try:
@@ -58,7 +112,7 @@ try:
         y_offset=80,
     )
 except Exception as e:
-    print(f"Display init error: {e}")
+    log.error("Display init error: %s", e)
     exit(1)
 
 # Create blank image for drawing
@@ -67,9 +121,80 @@ width = disp.height
 image = Image.new("RGB", (width, height))
 rotation = 180
 
+# Two preallocated big-endian RGB565 frames in panel orientation.
+# disp.image() converts through a Python list of every pixel byte; converting
+# with NumPy and writing the window ourselves is many times faster on a Pi
+# Zero. A writer thread sends one frame over SPI (~38ms for a full screen)
+# while the next is converted into the other, so rendering never waits on
+# the transfer.
+_frames = ([numpy.empty((height, width), dtype=">u2") for _ in range(2)]
+           if numpy is not None else None)
+_spi_cond = threading.Condition()
+_spi_pending = None  # (y0, y1, frame index) converted but not yet sent
+_spi_sending = None  # frame index the writer is sending
+
+
+def push_image(y0=0, y1=None):
+    """Queue rows y0..y1 of image for the panel, rotated by 180 degrees."""
+    global _spi_pending
+    if y1 is None:
+        y1 = height
+    if _frames is None:
+        if (y0, y1) == (0, height):
+            disp.image(image, rotation)
+        else:
+            disp.image(image.crop((0, y0, width, y1)), rotation, 0, height - y1)
+        return
+    with _spi_cond:
+        if _spi_pending is not None:
+            # The writer hasn't picked up the last strip yet: fold it into
+            # this one (image already holds the newest pixels for both).
+            y0 = min(y0, _spi_pending[0])
+            y1 = max(y1, _spi_pending[1])
+            idx = _spi_pending[2]
+        else:
+            idx = 1 if _spi_sending == 0 else 0
+        rgb = numpy.asarray(image.crop((0, y0, width, y1)))[::-1, ::-1]
+        r = rgb[..., 0].astype(numpy.uint16)
+        g = rgb[..., 1].astype(numpy.uint16)
+        b = rgb[..., 2].astype(numpy.uint16)
+        # Rotated 180 degrees, image rows y0..y1 land at panel rows height-y1..height-y0
+        _frames[idx][height - y1:height - y0] = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+        _spi_pending = (y0, y1, idx)
+        _spi_cond.notify()
+
+
+def flush_display():
+    """Block until every queued strip has been written to the panel."""
+    with _spi_cond:
+        _spi_cond.wait_for(lambda: _spi_pending is None and _spi_sending is None)
+
+
+def _spi_writer():
+    global _spi_pending, _spi_sending
+    while True:
+        with _spi_cond:
+            _spi_cond.wait_for(lambda: _spi_pending is not None)
+            y0, y1, idx = _spi_pending
+            _spi_pending = None
+            _spi_sending = idx
+        try:
+            data = _frames[idx][height - y1:height - y0].tobytes()
+            disp._block(0, height - y1, width - 1, height - y0 - 1, data)
+        except Exception as e:
+            log.error("Display write error: %s", e)
+        with _spi_cond:
+            _spi_sending = None
+            _spi_cond.notify_all()
+
+
+if _frames is not None:
+    threading.Thread(target=_spi_writer, daemon=True).start()
+
+
 draw = ImageDraw.Draw(image)
 draw.rectangle((0, 0, width, height), outline=0, fill=(0, 0, 0))
-disp.image(image, rotation)
+push_image()
 
 padding = -2
 top = padding
@@ -78,9 +203,26 @@ x = 0
 try:
     font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 24)
 except Exception as e:
-    print(f"Font error: {e}")
+    log.error("Font error: %s", e)
     exit(1)
 
+# Fixed-size font: the line advance is constant, so measure it once here
+# rather than calling getbbox for every rendered line.
+_ag_bbox = font.getbbox("Ag")
+LINE_ADVANCE = _ag_bbox[3] - _ag_bbox[1] + 12
+
+# Per-character advances, so label widths are a dict sum rather than a
+# FreeType layout pass.
+CHAR_W = {c: font.getlength(c) for c in string.printable}
+
+
+def text_width(text):
+    """Width of text in pixels at the main font size."""
+    try:
+        return sum(CHAR_W[c] for c in text)
+    except KeyError:
+        return font.getlength(text)
+
 try:
     font_small = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 16)
 except Exception:
@@ -91,24 +233,26 @@ backlight.switch_to_output()
 backlight.value = True
 
 
+FAVOURITES_FILE = os.path.expanduser("~/favourites.txt")
+
+
 def read_config():
     """Read node number (line 1) and up to 6 favourites from ~/favourites.txt."""
-    favorites_file = os.path.expanduser("~/favourites.txt")
     try:
-        with open(favorites_file, "r") as f:
+        with open(FAVOURITES_FILE, "r") as f:
             lines = f.readlines()
 
         if not lines:
-            print("Error: favourites.txt is empty")
+            log.error("favourites.txt is empty")
             return None, {}
 
         node_number_line = lines[0].strip()
         if not node_number_line or not node_number_line.isdigit():
-            print(f"Error: First line '{node_number_line}' is not a valid node number")
+            log.error("First line '%s' is not a valid node number", node_number_line)
             return None, {}
 
         node_number = node_number_line
-        print(f"Using node number: {node_number}")
+        log.info("Using node number: %s", node_number)
 
         favorites = {}
         favorite_count = 0
@@ -120,10 +264,10 @@ def read_config():
                 favorites[parts[1]] = parts[0]
                 favorite_count += 1
 
-        print(f"Loaded favorites: {favorites}")
+        log.info("Loaded favorites: %s", favorites)
         return node_number, favorites
     except Exception as e:
-        print(f"Config file error: {e}")
+        log.error("Config file error: %s", e)
         return None, {}
 
 
@@ -146,44 +290,98 @@ def lookup_node_name(node_number, favorites_dict=None):
 
 def get_ip_address():
     """Get IP address using native Python — no subprocess."""
+    # A UDP connect() sends no packets; it just makes the kernel pick the
+    # outbound interface. A non-routable private address avoids depending on
+    # a public host being reachable.
     try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("10.255.255.255", 1))
+            ip = s.getsockname()[0]
         return f"IP: {ip}"
     except Exception:
         return "IP: No connection"
 
 
+# /proc/uptime is read once; later refreshes add the monotonic clock's delta,
+# which advances at the same rate, so the periodic tick touches no files.
+try:
+    with open("/proc/uptime", "r") as f:
+        UPTIME0 = float(f.read().split()[0])
+except Exception as e:
+    log.error("Uptime read error: %s", e)
+    UPTIME0 = None
+MONO0 = time.monotonic()
+
+
 def get_uptime():
-    """Get uptime from /proc/uptime — no subprocess."""
-    try:
-        with open("/proc/uptime", "r") as f:
-            seconds = float(f.read().split()[0])
-        days = int(seconds // (24 * 3600))
-        hours = int((seconds % (24 * 3600)) // 3600)
-        minutes = int((seconds % 3600) // 60)
-        return f"Uptime: {days:02d}:{hours:02d}:{minutes:02d}"
-    except Exception:
+    """Get uptime from the /proc/uptime reading taken at startup plus elapsed monotonic time."""
+    if UPTIME0 is None:
         return "Uptime: Error"
+    seconds = UPTIME0 + (time.monotonic() - MONO0)
+    days = int(seconds // (24 * 3600))
+    hours = int((seconds % (24 * 3600)) // 3600)
+    minutes = int((seconds % 3600) // 60)
+    return f"Uptime: {days:02d}:{hours:02d}:{minutes:02d}"
 
 
 _sysinfo_cache = {"ip": "IP: Starting...", "uptime": "Uptime: Starting...", "last_update": 0}
-SYSINFO_INTERVAL = 5.0
+SYSINFO_INTERVAL_NS = 5_000_000_000
 
 
-def get_cached_sysinfo(current_time):
-    if current_time - _sysinfo_cache["last_update"] >= SYSINFO_INTERVAL:
+def get_cached_sysinfo(now):
+    """Return (IP, Uptime) text, refreshed at most every SYSINFO_INTERVAL_NS; now is monotonic_ns."""
+    if now - _sysinfo_cache["last_update"] >= SYSINFO_INTERVAL_NS:
         _sysinfo_cache["ip"] = get_ip_address()
         _sysinfo_cache["uptime"] = get_uptime()
-        _sysinfo_cache["last_update"] = current_time
+        _sysinfo_cache["last_update"] = now
     return _sysinfo_cache["ip"], _sysinfo_cache["uptime"]
 
 
-node_number, favorites = read_config()
+class FavouritesCache:
+    """read_config() result plus the favourites menu list, rebuilt only when the file changes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = -1  # st_mtime_ns of the last read; None if the file was missing
+        self.node_number = None
+        self.favorites = {}
+        self._list = [("Exit", "0")]
+
+    @property
+    def favorites_list(self):
+        return self._list
+
+    def refresh(self):
+        """Re-read the file if its mtime has changed. Returns True if the contents were reloaded."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        new_node_number, new_favorites = read_config()
+        if new_node_number is None and self.node_number is not None:
+            return False  # keep the last good config if an edit broke the file
+        self.node_number = new_node_number
+        self.favorites = new_favorites
+        self._list = [(name, num) for num, name in new_favorites.items()][:6]
+        self._list.append(("Exit", "0"))
+        return True
+
+
+_favourites = FavouritesCache(FAVOURITES_FILE)
+
+
+def get_favorites():
+    """Return (node_number, favorites, favorites_list, changed); only re-parses when the file's mtime moves."""
+    changed = _favourites.refresh()
+    return _favourites.node_number, _favourites.favorites, _favourites.favorites_list, changed
+
+
+node_number, favorites, favorites_list, _ = get_favorites()
 if node_number is None:
-    print("Failed to read node number from favourites.txt")
+    log.error("Failed to read node number from favourites.txt")
     exit(1)
 
 
@@ -209,62 +407,146 @@ _display_state = {
 }
 
 
-def _render():
-    """Read shared state, draw to PIL image, push to SPI."""
-    with _render_lock:
-        with _state_lock:
-            s = dict(_display_state)
+# Selection marker prefixes, shared by every row instead of formatting new ones each frame
+ARROW = "> "
+NOARROW = "  "
+
+
+def _layout(s):
+    """Return the (y, text, fill) rows that make up the screen for state s."""
+    rows = []
+    y = top
+
+    if s["mode"] == "shutdown":
+        rows.append((y + 60, "SHUTTING DOWN", "#FF0000"))
+        rows.append((y + 60 + LINE_ADVANCE, "Safe to power off", "#FFFF00"))
+        rows.append((y + 60 + 2 * LINE_ADVANCE, "in 15 seconds", "#FFFF00"))
+        return rows
+
+    if s["mode"] == "main":
+        rows.append((y, s["IP"], "#FFFFFF"))
+        y += LINE_ADVANCE
+
+        rows.append((y, s["Uptime"], "#0000FF"))
+        y += LINE_ADVANCE
+
+        lbl = (ARROW if s["selection_index"] == 0 else NOARROW) + "Favourites"
+        rows.append((y, lbl, "#FFFF00"))
+        y += LINE_ADVANCE
+
+        for i, node in enumerate(s["Nodes"]):
+            lbl = (ARROW if s["selection_index"] == i + 1 else NOARROW) + node
+            rows.append((y, lbl, "#00FF00"))
+            y += LINE_ADVANCE
+
+        if s["linked_nodes_count"] > 0:
+            rows.append((height - 28, f"{s['linked_nodes_count']} nodes linked", "#00FF00"))
+
+    else:  # favorites
+        for i, (name, num) in enumerate(s["favorites_list"]):
+            lbl = (ARROW if s["selection_index"] == i else NOARROW) + name
+            if name != "Exit":
+                lbl += ": " + num
+            rows.append((y, lbl, "#FFFF00" if name == "Exit" else "#00FF00"))
+            y += LINE_ADVANCE
+
+    msg = s["status_message"] or s["error_message"]
+    if msg:
+        rows.append((y, msg, "#FF8800" if s["status_message"] else "#FF0000"))
+    return rows
+
 
-        draw.rectangle((0, 0, width, height), outline=0, fill=(0, 0, 0))
-        y = top
+@functools.lru_cache(maxsize=64)
+def render_line(text):
+    """Rasterise one line of text to an L-mode mask, cached so repeat frames skip FreeType."""
+    # Sized to the text (plus a little slack for glyph overhang) so pasting
+    # doesn't blend a full-width strip of empty mask.
+    mask_width = max(1, min(width, int(text_width(text)) + 4))
+    mask = Image.new("L", (mask_width, LINE_ADVANCE), 0)
+    ImageDraw.Draw(mask).text((0, 0), text, font=font, fill=255)
+    return mask
 
-        if s["mode"] == "shutdown":
-            draw.text((x, y + 60), "SHUTTING DOWN", font=font, fill="#FF0000")
-            y2 = y + 60 + font.getbbox("SHUTTING DOWN")[3] - font.getbbox("SHUTTING DOWN")[1] + 12
-            draw.text((x, y2), "Safe to power off", font=font, fill="#FFFF00")
-            y2 += font.getbbox("Safe to power off")[3] - font.getbbox("Safe to power off")[1] + 12
-            draw.text((x, y2), "in 15 seconds", font=font, fill="#FFFF00")
 
-        elif s["mode"] == "main":
-            draw.text((x, y), s["IP"], font=font, fill="#FFFFFF")
-            y += font.getbbox(s["IP"])[3] - font.getbbox(s["IP"])[1] + 12
+def paste_line(target, y, text, fill):
+    """Draw one line of text into target at row y using the cached mask."""
+    mask = render_line(text)
+    target.paste(fill, (x, y, x + mask.width, y + LINE_ADVANCE), mask)
 
-            draw.text((x, y), s["Uptime"], font=font, fill="#0000FF")
-            y += font.getbbox(s["Uptime"])[3] - font.getbbox(s["Uptime"])[1] + 12
 
-            lbl = "> Favourites" if s["selection_index"] == 0 else "  Favourites"
-            draw.text((x, y), lbl, font=font, fill="#FFFF00")
-            y += font.getbbox(lbl)[3] - font.getbbox(lbl)[1] + 12
+@functools.lru_cache(maxsize=1)
+def _favorites_template(favorites_list):
+    """Favourites screen with every row unselected, rebuilt only when the list changes.
 
-            for i, node in enumerate(s["Nodes"]):
-                lbl = f"> {node}" if s["selection_index"] == i + 1 else f"  {node}"
-                draw.text((x, y), lbl, font=font, fill="#00FF00")
-                y += font.getbbox(node)[3] - font.getbbox(node)[1] + 12
+    Returns (image, rows). Favourites frames start from a copy of this, so only
+    the selected row and any message need drawing on top.
+    """
+    rows = _layout({"mode": "favorites", "selection_index": -1, "favorites_list": favorites_list,
+                    "status_message": "", "error_message": ""})
+    template = Image.new("RGB", (width, height), (0, 0, 0))
+    for ry, text, fill in rows:
+        paste_line(template, ry, text, fill)
+    return template, frozenset(rows)
 
-            if s["linked_nodes_count"] > 0:
-                draw.text((x, height - 28), f"{s['linked_nodes_count']} nodes linked",
-                          font=font, fill="#00FF00")
 
-            msg = s["status_message"] or s["error_message"]
-            if msg:
-                draw.text((x, y), msg, font=font,
-                          fill="#FF8800" if s["status_message"] else "#FF0000")
+# Mode and rows last pushed to the panel, so _render can send only the
+# strip of rows that changed (usually just the two arrow lines).
+_prev_frame = None
 
-        else:  # favorites
-            for i, (name, num) in enumerate(s["favorites_list"]):
-                lbl = f"> {name}" if s["selection_index"] == i else f"  {name}"
-                if name != "Exit":
-                    lbl += f": {num}"
-                draw.text((x, y), lbl, font=font,
-                          fill="#FFFF00" if name == "Exit" else "#00FF00")
-                y += font.getbbox(lbl)[3] - font.getbbox(lbl)[1] + 12
 
-            msg = s["status_message"] or s["error_message"]
-            if msg:
-                draw.text((x, y), msg, font=font,
-                          fill="#FF8800" if s["status_message"] else "#FF0000")
+def _render():
+    """Read shared state, draw changed rows to the PIL image, push them to SPI."""
+    global _prev_frame
+    with _render_lock:
+        with _state_lock:
+            s = dict(_display_state)
 
-        disp.image(image, rotation)
+        rows = _layout(s)
+        prev_rows = _prev_frame[1] if _prev_frame is not None else []
+        if _prev_frame is None or _prev_frame[0] != s["mode"]:
+            y0, y1 = 0, height
+        else:
+            changed = set(rows) ^ set(prev_rows)
+            if not changed:
+                return
+            y0 = min(r[0] for r in changed)
+            y1 = max(r[0] for r in changed) + LINE_ADVANCE
+            # Grow the strip to whole rows so no glyph is left half-cleared
+            grown = True
+            while grown:
+                grown = False
+                for ry, _, _ in rows + prev_rows:
+                    if ry < y1 and ry + LINE_ADVANCE > y0 and (ry < y0 or ry + LINE_ADVANCE > y1):
+                        y0 = min(y0, ry)
+                        y1 = max(y1, ry + LINE_ADVANCE)
+                        grown = True
+            y0, y1 = max(0, y0), min(height, y1)
+            if y0 >= y1:
+                # Only rows below the bottom edge changed (e.g. the message
+                # under a full favourites list): nothing visible to redraw.
+                _prev_frame = (s["mode"], rows)
+                return
+
+        if s["mode"] == "favorites":
+            template, base_rows = _favorites_template(tuple(s["favorites_list"]))
+            image.paste(template.crop((0, y0, width, y1)), (0, y0))
+        elif _prev_frame is None:
+            draw.rectangle((0, 0, width, height), outline=0, fill=(0, 0, 0))
+            base_rows = frozenset()
+        else:
+            # Everything outside a text row is already black, so only the
+            # strips of old and new rows inside the dirty region need clearing.
+            for ry in {r[0] for r in rows + prev_rows if r[0] < y1 and r[0] + LINE_ADVANCE > y0}:
+                draw.rectangle((0, ry, width, ry + LINE_ADVANCE - 1), outline=0, fill=(0, 0, 0))
+            base_rows = frozenset()
+        for row in rows:
+            ry, text, fill = row
+            if ry < y1 and ry + LINE_ADVANCE > y0 and row not in base_rows:
+                if base_rows:
+                    draw.rectangle((0, ry, width, ry + LINE_ADVANCE - 1), outline=0, fill=(0, 0, 0))
+                paste_line(image, ry, text, fill)
+
+        push_image(y0, y1)
+        _prev_frame = (s["mode"], rows)
 
 
 def _display_worker():
@@ -274,7 +556,7 @@ def _display_worker():
         try:
             _render()
         except Exception as e:
-            print(f"Display error: {e}")
+            log.error("Display error: %s", e)
 
 
 def mark_dirty(**updates):
@@ -286,110 +568,373 @@ def mark_dirty(**updates):
 # ===== END DISPLAY THREAD =====
 
 
-# ===== ASYNC ASTERISK HELPER =====
+# ===== ASTERISK MANAGER (AMI) CLIENT =====
+# Forking `sudo asterisk -rx` costs a few hundred ms of CPU on a Pi Zero for
+# every poll. AMI lets us keep one TCP connection open and send CLI commands
+# over it instead.
+
+class AmiError(Exception):
+    """AMI could not be reached; the command was not sent, so it is safe to retry another way."""
+
+
+class AmiAuthError(AmiError):
+    """Asterisk rejected the manager login, or the user may not run commands."""
+
+
+class AmiUnavailable(AmiError):
+    """AMI was skipped: backing off after a failed connect, or disabled by a rejected login."""
+
+
+class AmiClient:
+    """Minimal persistent AMI connection for running CLI commands."""
+
+    RETRY_DELAY = 60.0  # seconds to wait after a failed connect before trying AMI again
+
+    def __init__(self, host, port, username, secret, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.secret = secret
+        self.timeout = timeout
+        self._sock = None
+        self._buf = b""
+        self._action_id = 0
+        self._lock = threading.Lock()
+        self._retry_at = 0.0
+        self.disabled = False  # set after a rejected login; AMI is not tried again
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._buf = b""
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._buf = b""
+        self._read_until(b"\r\n")  # "Asterisk Call Manager/x.y" banner
+        headers, _ = self._action("Login", Username=self.username, Secret=self.secret, Events="off")
+        if headers.get("Response") != "Success":
+            raise AmiAuthError(headers.get("Message", "login failed"))
+
+    def _read_until(self, marker):
+        while marker not in self._buf:
+            chunk = self._sock.recv(4096)
+            if not chunk:
+                raise AmiError("connection closed by Asterisk")
+            self._buf += chunk
+        data, self._buf = self._buf.split(marker, 1)
+        return data
+
+    def _action(self, action, **fields):
+        """Send one action and return (headers, output_lines) of its response."""
+        self._action_id += 1
+        action_id = str(self._action_id)
+        msg = f"Action: {action}\r\nActionID: {action_id}\r\n"
+        msg += "".join(f"{k}: {v}\r\n" for k, v in fields.items())
+        self._sock.sendall((msg + "\r\n").encode())
+
+        while True:
+            block = self._read_until(b"\r\n\r\n").decode(errors="replace")
+            if block.startswith("Response: Follows") and "--END COMMAND--" not in block:
+                # Pre-Asterisk 14 format: raw output terminated by --END COMMAND--
+                block += "\r\n\r\n" + self._read_until(b"--END COMMAND--\r\n\r\n").decode(errors="replace")
+            lines = block.split("--END COMMAND--", 1)[0].split("\r\n")
+            headers = {}
+            while lines:
+                key, sep, value = lines[0].partition(": ")
+                if not sep or key == "Output":
+                    break
+                headers[key] = value
+                lines.pop(0)
+            output = [line[len("Output: "):] if line.startswith("Output: ") else line
+                      for line in lines]
+            if headers.get("ActionID") != action_id:
+                continue  # stale response or unsolicited event
+            return headers, output
+
+    def command(self, cmd):
+        """Run an Asterisk CLI command and return its output as text.
+
+        Raises AmiError if the command could not be sent. A timeout waiting for
+        the reply is raised as TimeoutError: the command may already have run,
+        so callers must not repeat it.
+        """
+        with self._lock:
+            if self._sock is None:
+                if self.disabled or time.monotonic() < self._retry_at:
+                    raise AmiUnavailable()
+                try:
+                    self._connect()
+                except AmiAuthError:
+                    self.close()
+                    self.disabled = True
+                    raise
+                except (OSError, AmiError) as e:
+                    self.close()
+                    self._retry_at = time.monotonic() + self.RETRY_DELAY
+                    raise AmiError(str(e)) from e
+            try:
+                headers, output = self._action("Command", Command=cmd)
+            except socket.timeout:
+                self.close()
+                raise
+            except (OSError, AmiError) as e:
+                self.close()
+                raise AmiError(str(e)) from e
+            if headers.get("Response") == "Error" and not any(output):
+                # An error with no output (e.g. "Permission denied" when the
+                # manager user lacks the command privilege) means the command
+                # never ran; stop using AMI so the CLI handles this and later calls.
+                self.close()
+                self.disabled = True
+                raise AmiAuthError(headers.get("Message", "command refused"))
+            return "\n".join(output) + "\n"
+
+
+_ami = AmiClient(AMI_HOST, AMI_PORT, AMI_USERNAME, AMI_SECRET) if AMI_SECRET else None
+
+# Members of the asterisk group can use the CLI control socket directly,
+# which saves launching sudo on every command.
+ASTERISK_CTL = "/var/run/asterisk/asterisk.ctl"
+# All Asterisk jobs share one worker thread, so a hung `asterisk -rx` must
+# not be allowed to block every later command.
+ASTERISK_TIMEOUT = 10
+
+
+def asterisk_command(cmd):
+    """Run an Asterisk CLI command over AMI if configured, else via `asterisk -rx`."""
+    if _ami is not None and not _ami.disabled:
+        try:
+            return _ami.command(cmd)
+        except AmiAuthError as e:
+            log.error("AMI refused (%s); using asterisk -rx from now on", e)
+        except AmiUnavailable:
+            pass
+        except AmiError as e:
+            log.warning("AMI error (%s), falling back to asterisk -rx", e)
+    argv = ["asterisk", "-rx", cmd]
+    if not os.access(ASTERISK_CTL, os.W_OK):
+        argv = ["sudo"] + argv
+    return subprocess.check_output(argv, stderr=subprocess.STDOUT, timeout=ASTERISK_TIMEOUT).decode()
+# ===== END ASTERISK MANAGER (AMI) CLIENT =====
+
+
+# ===== ASTERISK WORKER THREAD =====
+# One long-lived thread runs every Asterisk job (connect/disconnect and the
+# periodic status poll) in order, instead of starting a new thread per
+# command. The main loop schedules the jobs; they post results back through
+# callbacks and the main loop's wake event.
+_asterisk_jobs = queue.Queue()
+
+
+def _asterisk_worker():
+    while True:
+        job = _asterisk_jobs.get()
+        try:
+            job()
+        except Exception as e:
+            log.error("Asterisk worker error: %s", e)
+
+
 def _run_asterisk(cmd, on_done=None):
-    """Run an asterisk command in a daemon thread; call on_done(ok, output) when done."""
+    """Queue an asterisk command for the worker thread; call on_done(ok, output) when done."""
     def _run():
         try:
-            out = subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT).decode()
+            out = asterisk_command(cmd)
             if on_done:
                 on_done(True, out)
         except subprocess.CalledProcessError as e:
             if on_done:
                 on_done(False, e.output.decode())
+        except (subprocess.TimeoutExpired, TimeoutError):
+            if on_done:
+                on_done(False, f"timed out: {cmd}")
         except Exception as e:
             if on_done:
                 on_done(False, str(e))
-    threading.Thread(target=_run, daemon=True).start()
-# ===== END ASYNC ASTERISK HELPER =====
+    _asterisk_jobs.put(_run)
+# ===== END ASTERISK WORKER THREAD =====
+
+
+# ===== MAIN LOOP EVENTS =====
+# Falling-edge callbacks run on RPi.GPIO's thread; they only record the pin
+# number and wake the main loop, which drains every pending press in one go
+# and pushes a single display update for the batch. bouncetime replaces the
+# old software debounce. The node status poll posts its result the same way.
+_pending_lock = threading.Lock()
+_pending_presses = []
+_pending_status = None
+_wake = threading.Event()
+
+
+# A press held past bouncetime can bounce on release and fire a second
+# falling edge, which finds the pin already high. A quick tap whose callback
+# was delayed (waiting for the GIL) also finds the pin high, so only high-pin
+# edges this soon after an accepted press are treated as release bounce.
+# Trade-off: a bounce after a hold longer than this still counts as a press,
+# and a second tap inside the window is lost only if its callback runs late.
+RELEASE_BOUNCE_NS = 300_000_000
+_last_press_ns = {BUTTON_A_PIN: 0, BUTTON_B_PIN: 0}
 
 
-def handle_buttons(display_mode, selection_index, connected_nodes, favorites_list):
-    current_time = time.time()
-    global last_button_a_time, last_button_b_time, last_button_a_state, last_button_b_state
+def _on_button(channel):
+    now = time.monotonic_ns()
+    if not button_is_down(channel) and now - _last_press_ns[channel] < RELEASE_BOUNCE_NS:
+        return
+    _last_press_ns[channel] = now
+    with _pending_lock:
+        _pending_presses.append(channel)
+    _wake.set()
+
+
+_status_poll_busy = threading.Event()
+
+
+def _poll_node_status(node):
+    """Asterisk worker job: fetch rpt lstats / rpt nodes and post the result to the main loop."""
+    global _pending_status
+    try:
+        result = asterisk_command(f"rpt lstats {node}")
+        try:
+            count_result = asterisk_command(f"rpt nodes {node}")
+        except Exception:
+            count_result = None
+        status = (result, count_result, None)
+    except Exception as e:
+        status = (None, None, e)
+    with _pending_lock:
+        _pending_status = status
+    _status_poll_busy.clear()
+    _wake.set()
+
+
+def take_pending_events():
+    """Return and clear (button presses oldest first, node status result or None)."""
+    global _pending_status
+    with _pending_lock:
+        presses = _pending_presses[:]
+        _pending_presses.clear()
+        status, _pending_status = _pending_status, None
+        _wake.clear()
+    return presses, status
+
+
+def _poll_buttons():
+    """Fallback when edge interrupts are unavailable: poll the buttons at 50Hz."""
+    debounce_ns = 50_000_000
+    last_state = {BUTTON_A_PIN: False, BUTTON_B_PIN: False}
+    last_press = {BUTTON_A_PIN: 0, BUTTON_B_PIN: 0}
+    while True:
+        now = time.monotonic_ns()
+        for pin in (BUTTON_A_PIN, BUTTON_B_PIN):
+            pressed = button_is_down(pin)
+            if pressed and not last_state[pin] and now - last_press[pin] > debounce_ns:
+                last_press[pin] = now
+                _on_button(pin)
+            last_state[pin] = pressed
+        time.sleep(0.02)
+
+
+_use_button_polling = GPIO is None
+if GPIO is not None:
+    try:
+        GPIO.add_event_detect(BUTTON_A_PIN, GPIO.FALLING, callback=_on_button, bouncetime=50)
+        GPIO.add_event_detect(BUTTON_B_PIN, GPIO.FALLING, callback=_on_button, bouncetime=50)
+    except RuntimeError as e:
+        # RPi.GPIO 0.7.x fails here on 6.6+ kernels ("Failed to add edge detection")
+        log.warning("GPIO edge detection unavailable (%s); polling buttons instead", e)
+        for pin in (BUTTON_A_PIN, BUTTON_B_PIN):
+            try:
+                GPIO.remove_event_detect(pin)
+            except Exception:
+                pass
+        _use_button_polling = True
+if _use_button_polling:
+    threading.Thread(target=_poll_buttons, daemon=True).start()
+# ===== END MAIN LOOP EVENTS =====
+
+
+def handle_button(channel, display_mode, selection_index, connected_nodes, favorites_list):
+    """Apply one button press; return the new (display_mode, selection_index)."""
     new_mode = display_mode
     new_index = selection_index
-    button_pressed = False
 
     # Button A: Cycle selection
-    button_a_state = not button_a.value
-    if button_a_state and not last_button_a_state and (current_time - last_button_a_time) > debounce_delay:
-        button_pressed = True
+    if channel == BUTTON_A_PIN:
         if display_mode == "main":
             new_index = (selection_index + 1) % (1 + len(connected_nodes))
         else:
             new_index = (selection_index + 1) % len(favorites_list)
-        last_button_a_time = current_time
-        print(f"Button A: Selected index {new_index}")
+        log.debug("Button A: Selected index %d", new_index)
 
     # Button B: Connect/disconnect or switch modes
-    button_b_state = not button_b.value
-    if button_b_state and not last_button_b_state and (current_time - last_button_b_time) > debounce_delay:
-        button_pressed = True
+    elif channel == BUTTON_B_PIN:
         if display_mode == "main":
             if selection_index == 0:
                 new_mode = "favorites"
                 new_index = 0
-                print("Button B: Switched to favorites mode")
+                log.debug("Button B: Switched to favorites mode")
             elif selection_index <= len(connected_nodes):
                 node = connected_nodes[selection_index - 1]
-                print(f"Button B: Disconnecting node {node}")
+                log.debug("Button B: Disconnecting node %s", node)
                 mark_dirty(status_message=f"Disconnecting {node}...", error_message="")
                 def _on_disconnect(ok, result, _node=node):
                     if ok:
-                        print(f"Disconnected {_node}: {result}")
+                        log.debug("Disconnected %s: %s", _node, result)
                         mark_dirty(status_message="")
                     else:
-                        print(f"Disconnect error: {result}")
+                        log.error("Disconnect error: %s", result)
                         mark_dirty(status_message="", error_message="Disconnect failed")
                 _run_asterisk(
-                    f"sudo asterisk -rx 'rpt cmd {node_number} ilink 1 {node}'",
+                    f"rpt cmd {node_number} ilink 1 {node}",
                     _on_disconnect,
                 )
         else:  # favorites mode
             if selection_index < len(favorites_list) - 1:
                 name, node = favorites_list[selection_index]
-                print(f"Button B: Connecting to {name}: {node}")
+                log.debug("Button B: Connecting to %s: %s", name, node)
                 new_mode = "main"
                 new_index = 0
                 mark_dirty(mode="main", selection_index=0,
                            status_message=f"Connecting {name}...", error_message="")
                 def _on_connect(ok, result, _name=name, _node=node):
                     if ok:
-                        print(f"Connected to {_name} ({_node}): {result}")
+                        log.debug("Connected to %s (%s): %s", _name, _node, result)
                         mark_dirty(status_message="")
                     else:
-                        print(f"Connect error: {result}")
+                        log.error("Connect error: %s", result)
                         mark_dirty(status_message="", error_message="Connect failed")
                 _run_asterisk(
-                    f"sudo asterisk -rx 'rpt cmd {node_number} ilink 3 {node}'",
+                    f"rpt cmd {node_number} ilink 3 {node}",
                     _on_connect,
                 )
             else:
-                print("Button B: Exit favorites")
+                log.debug("Button B: Exit favorites")
                 new_mode = "main"
                 new_index = 0
-        last_button_b_time = current_time
 
-    last_button_a_state = button_a_state
-    last_button_b_state = button_b_state
-    return new_mode, new_index, button_pressed
+    return new_mode, new_index
 
 
-def check_shutdown():
-    """Hold both buttons for 2 seconds to initiate a safe shutdown."""
+def check_shutdown(now):
+    """Hold both buttons for 2 seconds to initiate a safe shutdown; now is monotonic_ns."""
     global shutdown_pressed, shutdown_start_time
-    both_pressed = (not button_a.value) and (not button_b.value)
+    both_pressed = button_is_down(BUTTON_A_PIN) and button_is_down(BUTTON_B_PIN)
     if both_pressed:
         if not shutdown_pressed:
             shutdown_pressed = True
-            shutdown_start_time = time.time()
-        elif time.time() - shutdown_start_time >= shutdown_hold_duration:
+            shutdown_start_time = now
+        elif now - shutdown_start_time >= SHUTDOWN_HOLD_NS:
             with _state_lock:
                 _display_state["mode"] = "shutdown"
             _render()  # renders directly in main thread; _render_lock blocks display thread
-            print("Shutdown initiated by button press")
-            subprocess.run("sudo shutdown -h now", shell=True)
+            flush_display()
+            log.warning("Shutdown initiated by button press")
+            subprocess.run(["sudo", "shutdown", "-h", "now"])
             time.sleep(15)
             exit(0)
     else:
@@ -397,24 +942,27 @@ def check_shutdown():
     return both_pressed
 
 
-# Initialize state
+# rpt lstats rows for established links start with the peer node number;
+# rpt nodes lists each linked node as T<number>.
+_ESTABLISHED_RE = re.compile(r"^[ \t]*(\d+)[ \t].*ESTABLISHED", re.M)
+_LINKED_NODE_RE = re.compile(r"T[0-9A-Z]+")
+
+# Initialize state. All timestamps are integer time.monotonic_ns() values, read
+# once per loop iteration, so NTP stepping the wall clock at boot can't stall
+# or burst the periodic updates.
+DISPLAY_UPDATE_INTERVAL_NS = 5_000_000_000
+NODES_UPDATE_INTERVAL_NS = 5_000_000_000
+SHUTDOWN_HOLD_NS = 2_000_000_000
 display_mode = "main"
 selection_index = 0
-last_button_a_time = 0
-last_button_b_time = 0
-last_button_a_state = False
-last_button_b_state = False
-debounce_delay = 0.05
 last_display_update = 0
 last_nodes_update = 0
-display_update_interval = 5.0
-nodes_update_interval = 5.0
 connected_nodes = []
 Nodes = ["Nodes: None"]
+nodes_stale = True
 linked_nodes_count = 0
 shutdown_pressed = False
 shutdown_start_time = 0
-shutdown_hold_duration = 2.0
 
 
 # ===== STARTUP SPLASH (synchronous — display thread not yet running) =====
@@ -423,68 +971,94 @@ draw.text((x, top + 20),  f"ASL3 v{VERSION}",   font=font, fill="#FFFFFF")
 draw.text((x, top + 60),  "Display Driver",      font=font, fill="#FFFFFF")
 draw.text((x, top + 110), "Copyright 2026",      font=font, fill="#FFFFFF")
 draw.text((x, top + 160), "G1LRO.UK",            font=font, fill="#FFFFFF")
-disp.image(image, rotation)
+push_image()
 time.sleep(1)
 # ===== END STARTUP SPLASH =====
 
 
-# Start display thread, then wait for Asterisk to be ready
+# Start display and Asterisk worker threads, then wait for Asterisk to be ready
 _display_thread = threading.Thread(target=_display_worker, daemon=True)
 _display_thread.start()
+_asterisk_thread = threading.Thread(target=_asterisk_worker, daemon=True)
+_asterisk_thread.start()
 
-print("Waiting for Asterisk...")
+log.info("Waiting for Asterisk...")
 time.sleep(10)
 
+now = time.monotonic_ns()
 while True:
-    current_time = time.time()
-
-    if check_shutdown():
+    # Sleep until a button edge arrives or the next periodic update is due.
+    # While both buttons are held, wake often enough to time the shutdown hold.
+    next_due = min(last_nodes_update + NODES_UPDATE_INTERVAL_NS,
+                   last_display_update + DISPLAY_UPDATE_INTERVAL_NS)
+    timeout = 0.05 if shutdown_pressed else max(0, next_due - now) / 1e9
+    _wake.wait(timeout)
+    presses, status = take_pending_events()
+    now = time.monotonic_ns()
+
+    if check_shutdown(now):
         continue
 
-    # Update node status periodically
-    if current_time - last_nodes_update >= nodes_update_interval:
-        try:
-            cmd = f"sudo asterisk -rx 'rpt lstats {node_number}'"
-            result = subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT).decode()
-            print("AllStarLink output:", result)
-            lines = result.splitlines()[2:]
-            connected_nodes = []
-            for line in lines:
-                if "ESTABLISHED" in line:
-                    parts = line.split()
-                    if parts and parts[0].isdigit():
-                        connected_nodes.append(parts[0])
-            Nodes = (
-                [f"{lookup_node_name(n, favorites)}: {n}" for n in connected_nodes[:3]]
-                if connected_nodes else ["Nodes: None"]
-            )
-            try:
-                count_result = subprocess.check_output(
-                    f"sudo asterisk -rx 'rpt nodes {node_number}'",
-                    shell=True, stderr=subprocess.STDOUT,
-                ).decode()
-                linked_nodes_count = max(0, len(re.findall(r"T[0-9A-Z]+", count_result)) - 1)
-            except Exception:
+    # Poll node status periodically. Asterisk can take a while to answer, so
+    # the poll runs on the Asterisk worker and buttons stay responsive meanwhile.
+    if now - last_nodes_update >= NODES_UPDATE_INTERVAL_NS:
+        if not _status_poll_busy.is_set():
+            _status_poll_busy.set()
+            _asterisk_jobs.put(functools.partial(_poll_node_status, node_number))
+        last_nodes_update = now
+
+        node_number, favorites, favorites_list, favorites_changed = get_favorites()
+        if favorites_changed:
+            nodes_stale = True
+            if display_mode == "favorites" and selection_index >= len(favorites_list):
+                selection_index = 0
+
+    if status is not None:
+        result, count_result, error = status
+        if error is None:
+            log.debug("AllStarLink output: %s", result)
+            body = result.split("\n", 2)[2:]  # skip the two header lines
+            new_connected_nodes = _ESTABLISHED_RE.findall(body[0]) if body else []
+            # Node labels need an astdb.txt scan per node, so only rebuild
+            # them when the connected set (or the favourites) changed.
+            if nodes_stale or new_connected_nodes != connected_nodes:
+                connected_nodes = new_connected_nodes
+                Nodes = (
+                    [f"{lookup_node_name(n, favorites)}: {n}" for n in connected_nodes[:3]]
+                    if connected_nodes else ["Nodes: None"]
+                )
+                nodes_stale = False
+            if count_result is not None:
+                linked_nodes_count = max(0, len(_LINKED_NODE_RE.findall(count_result)) - 1)
+            else:
                 linked_nodes_count = 0
-        except subprocess.CalledProcessError as e:
-            print(f"AllStarLink error: {e.output.decode()}")
+        elif isinstance(error, subprocess.CalledProcessError):
+            log.error("AllStarLink error: %s", error.output.decode())
             Nodes = ["Nodes: Err"]
-        except FileNotFoundError:
-            print("Asterisk/sudo not found")
+            nodes_stale = True
+        elif isinstance(error, (subprocess.TimeoutExpired, TimeoutError)):
+            log.error("AllStarLink status poll timed out")
+            Nodes = ["Nodes: Err"]
+            nodes_stale = True
+        elif isinstance(error, FileNotFoundError):
+            log.error("Asterisk/sudo not found")
             Nodes = ["Nodes: No Asterisk"]
-        last_nodes_update = current_time
-
-    favorites_list = [(name, num) for num, name in favorites.items()][:6]
-    favorites_list.append(("Exit", "0"))
+            nodes_stale = True
+        else:
+            log.error("AllStarLink error: %s", error)
+            Nodes = ["Nodes: Err"]
+            nodes_stale = True
 
-    display_mode, selection_index, button_pressed = handle_buttons(
-        display_mode, selection_index, connected_nodes, favorites_list
-    )
+    button_pressed = bool(presses)
+    for channel in presses:
+        display_mode, selection_index = handle_button(
+            channel, display_mode, selection_index, connected_nodes, favorites_list
+        )
 
-    needs_update = button_pressed or (current_time - last_display_update >= display_update_interval)
+    needs_update = button_pressed or status is not None or (now - last_display_update >= DISPLAY_UPDATE_INTERVAL_NS)
 
     if needs_update:
-        IP, Uptime = get_cached_sysinfo(current_time)
+        IP, Uptime = get_cached_sysinfo(now)
         # Push data to display thread. status_message/error_message are intentionally
         # omitted here — they are owned by button handlers and async callbacks.
         mark_dirty(
@@ -497,6 +1071,4 @@ while True:
             IP=IP,
             Uptime=Uptime,
         )
-        last_display_update = current_time
-
-    time.sleep(0.02)  # 50Hz polling
+        last_display_update = now
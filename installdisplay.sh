@@ -126,6 +126,16 @@ if [ ! -f "$SUDOERS_D" ]; then
 else
     echo "✓ Sudo permissions already configured."
 fi
+# Members of the asterisk group can reach the CLI socket without sudo
+if getent group asterisk > /dev/null; then
+    if id -nG "$USER_NAME" | grep -qw asterisk; then
+        echo "✓ User is in asterisk group."
+    else
+        echo "Adding user $USER_NAME to asterisk group..."
+        sudo usermod -a -G asterisk "$USER_NAME"
+        echo "✓ Added to asterisk group (takes effect after the service restarts or on next login)."
+    fi
+fi
 
 # Step 9: Create virtual environment
 echo "Step 9: Creating virtual environment at $VENV_PATH..."
@@ -150,8 +160,16 @@ pip install sysv_ipc --no-build-isolation || {
 pip install --upgrade adafruit-python-shell adafruit-blinka
 
 # Step 11: Install specific libraries
-echo "Step 11: Installing Adafruit RGB Display and Pillow..."
-pip install adafruit-circuitpython-rgb-display pillow
+echo "Step 11: Installing Adafruit RGB Display, Pillow and NumPy..."
+pip install adafruit-circuitpython-rgb-display pillow numpy
+# RPi.GPIO gives interrupt-driven buttons. Leave any GPIO package Blinka already
+# chose alone; if this fails (e.g. Pi 5) the driver polls the buttons instead.
+if ! python -c "import RPi.GPIO" 2>/dev/null; then
+    echo "Installing RPi.GPIO (optional, for interrupt-driven buttons)..."
+    pip install RPi.GPIO || {
+        echo "Warning: RPi.GPIO installation failed. Buttons will be polled instead."
+    }
+fi
 
 # Step 12: Test Asterisk connectivity from virtual environment
 echo "Step 12: Testing Asterisk connectivity..."